@@ -0,0 +1,59 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable
+
+import numpy as np
+
+# ── persistent embedding cache ───────────────────────────────────────────
+#
+# Embeddings are keyed by sha256(model + "\0" + chunk_text) and stored as
+# raw float32 bytes in SQLite, so identical chunks never hit the OpenAI
+# API twice — including across uvicorn restarts.
+
+CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "embed_cache.sqlite3")
+
+_lock = threading.Lock()
+_conn: sqlite3.Connection | None = None
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _conn.execute("CREATE TABLE IF NOT EXISTS emb (key TEXT PRIMARY KEY, vec BLOB)")
+        _conn.commit()
+    return _conn
+
+
+def get_many(keys: Iterable[str]) -> Dict[str, np.ndarray]:
+    """Return the cached vectors for whichever keys are present."""
+    keys = list(keys)
+    if not keys:
+        return {}
+    found: Dict[str, np.ndarray] = {}
+    with _lock:
+        conn = _db()
+        # SQLite caps the number of bound parameters, so query in slices.
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT key, vec FROM emb WHERE key IN ({marks})", batch
+            ).fetchall()
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype="float32")
+    return found
+
+
+def put_many(vectors: Dict[str, np.ndarray]) -> None:
+    if not vectors:
+        return
+    rows = [
+        (key, np.asarray(vec, dtype="float32").tobytes())
+        for key, vec in vectors.items()
+    ]
+    with _lock:
+        conn = _db()
+        conn.executemany("INSERT OR REPLACE INTO emb (key, vec) VALUES (?, ?)", rows)
+        conn.commit()
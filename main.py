@@ -1,5 +1,5 @@
 # main.py — Phonics Phorest home (full background + centered Start)
-import base64, os
+import os
 import streamlit as st
 
 st.set_page_config(
@@ -9,105 +9,131 @@ st.set_page_config(
     initial_sidebar_state="collapsed",
 )
 
-def _b64(path: str) -> str | None:
-    if not os.path.exists(path):
-        return None
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode()
+# --- Instant skeleton: painted before the background image arrives ---
+# A few hundred bytes of inline CSS the browser can render immediately;
+# the real background covers it once it loads.
+_SKELETON = """
+<style>
+.skeleton {
+  position: fixed;
+  inset: 0;
+  display: flex;
+  align-items: center;
+  justify-content: center;
+  background: linear-gradient(160deg, #14532d, #052e16);
+  color: #dcfce7;
+  font-size: 22px;
+  font-weight: 700;
+  z-index: -3;
+}
+</style>
+<div class="skeleton">🌱 Loading…</div>
+"""
+st.markdown(_SKELETON, unsafe_allow_html=True)
 
-# --- EXPECTED LOCATIONS (same folder as main.py) ---
-BG_PATHS   = ["phonics_phorest.png", "assets/phonics_phorest.png"]
-BEAR_PATHS = ["waving_bear.png", "assets/waving_bear.png"]
+# --- EXPECTED LOCATIONS (served by Streamlit's static file server) ---
+# Prefer the WebP background when present (generate offline with
+# `cwebp -q 80 phonics_phorest.png -o phonics_phorest.webp`): same
+# quality at a fraction of the PNG bytes, and no base64 inflation.
+if os.path.exists("static/phonics_phorest.webp"):
+    BG_FILE = "static/phonics_phorest.webp"
+else:
+    BG_FILE = "static/phonics_phorest.png"
+BEAR_FILE = "static/waving_bear.png"
 
-def _first_existing(paths):
-    for p in paths:
-        if os.path.exists(p):
-            return p
-    return None
+# URLs the browser fetches (and caches) directly — no base64 inlining.
+BG_URL   = "app/" + BG_FILE
+BEAR_URL = "app/static/waving_bear.png"
 
-bg_file   = _first_existing(BG_PATHS)
-bear_file = _first_existing(BEAR_PATHS)
+# --- Page fragments assembled once at import time -------------------------
+# Reruns re-execute the script body, but these are plain module constants:
+# st.markdown gets a cached string reference, not a fresh f-string eval.
+_CSS_BLOCK = f"""
+<link rel="preload" as="image" href="{BG_URL}" />
+<style>
+/* Hide chrome */
+header, footer {{ visibility: hidden; }}
+[data-testid="stSidebar"] {{ display: none; }}
+.block-container {{ padding: 0; margin: 0; max-width: 100%; }}
 
-bg_b64   = _b64(bg_file)   if bg_file   else None
-bear_b64 = _b64(bear_file) if bear_file else None
+/* Full-page background on the app view container (most reliable) */
+[data-testid="stAppViewContainer"] {{
+  background-image: url("{BG_URL}");
+  background-size: cover;
+  background-position: center;
+  background-repeat: no-repeat;
+}}
 
-# --- CSS: apply background to the correct Streamlit container ---
-if bg_b64:
-    st.markdown(
-        f"""
-        <style>
-        /* Hide chrome */
-        header, footer {{ visibility: hidden; }}
-        [data-testid="stSidebar"] {{ display: none; }}
-        .block-container {{ padding: 0; margin: 0; max-width: 100%; }}
+/* Centered Start button */
+.center-wrap {{
+  position: fixed;
+  inset: 0;
+  display: flex;
+  align-items: center;
+  justify-content: center;
+  z-index: 10;
+}}
+.start-btn {{
+  font-size: 24px;
+  padding: 18px 40px;
+  border-radius: 20px;
+  border: none;
+  background: #ffffffee;
+  cursor: pointer;
+  font-weight: 700;
+  color: #1b4d2b;
+  box-shadow: 0 6px 16px rgba(0,0,0,0.25);
+  transition: transform .12s ease, background .12s ease;
+}}
+.start-btn:hover {{ background:#dfffe3; transform: scale(1.05); }}
 
-        /* Full-page background on the app view container (most reliable) */
-        [data-testid="stAppViewContainer"] {{
-          background-image: url("data:image/png;base64,{bg_b64}");
-          background-size: cover;
-          background-position: center;
-          background-repeat: no-repeat;
-        }}
+/* Waving bear, bottom-right */
+.waving-bear {{
+  position: fixed;
+  right: 20px;
+  bottom: 20px;
+  height: 120px;
+  aspect-ratio: 1 / 1;
+  z-index: 11;
+  transform-origin: bottom left;
+  animation: wave 1s ease-in-out infinite alternate;
+  will-change: transform;
+  transform: translateZ(0);
+}}
+@keyframes wave {{ 0% {{transform: rotate(0deg)}} 100% {{transform: rotate(15deg)}} }}
+</style>
+"""
 
-        /* Centered Start button */
-        .center-wrap {{
-          position: fixed;
-          inset: 0;
-          display: flex;
-          align-items: center;
-          justify-content: center;
-          z-index: 10;
-        }}
-        .start-btn {{
-          font-size: 24px;
-          padding: 18px 40px;
-          border-radius: 20px;
-          border: none;
-          background: #ffffffee;
-          cursor: pointer;
-          font-weight: 700;
-          color: #1b4d2b;
-          box-shadow: 0 6px 16px rgba(0,0,0,0.25);
-          transition: transform .12s ease, background .12s ease;
-        }}
-        .start-btn:hover {{ background:#dfffe3; transform: scale(1.05); }}
+_START_BODY = """
+<div class="center-wrap">
+  <form action="game">
+    <button class="start-btn">🌱 Start Adventure</button>
+  </form>
+</div>
+"""
 
-        /* Waving bear, bottom-right */
-        .waving-bear {{
-          position: fixed;
-          right: 20px;
-          bottom: 20px;
-          height: 120px;
-          z-index: 11;
-          transform-origin: bottom left;
-          animation: wave 1s ease-in-out infinite alternate;
-        }}
-        @keyframes wave {{ 0% {{transform: rotate(0deg)}} 100% {{transform: rotate(15deg)}} }}
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+_BEAR_BODY = f'<img class="waving-bear" src="{BEAR_URL}" />'
+
+# --- CSS: apply background to the correct Streamlit container ---
+if os.path.exists(BG_FILE):
+    st.markdown(_CSS_BLOCK, unsafe_allow_html=True)
 else:
     st.error(
-        "Background image not found. Place **phonics_phorest.png** in the same folder as `main.py` "
-        "(or `assets/phonics_phorest.png`)."
+        "Background image not found. Place **phonics_phorest.png** in the `static/` "
+        "folder next to `main.py`."
     )
 
 # --- Centered Start button that routes to /game (pages/game.py) ---
-st.markdown(
-    """
-    <div class="center-wrap">
-      <form action="game">
-        <button class="start-btn">🌱 Start Adventure</button>
-      </form>
-    </div>
-    """,
-    unsafe_allow_html=True,
-)
+st.markdown(_START_BODY, unsafe_allow_html=True)
 
 # --- Waving bear (optional) ---
-if bear_b64:
-    st.markdown(f'<img class="waving-bear" src="data:image/png;base64,{bear_b64}" />',
-                unsafe_allow_html=True)
+# The bear never changes, so scope it to its own fragment: unrelated
+# reruns don't re-send the <img> + animation CSS over the websocket.
+@st.fragment
+def _bear_fragment():
+    st.markdown(_BEAR_BODY, unsafe_allow_html=True)
+
+if os.path.exists(BEAR_FILE):
+    _bear_fragment()
 else:
-    st.info("Optional: add `waving_bear.png` next to `main.py` for the waving bear.")
+    st.info("Optional: add `waving_bear.png` to `static/` for the waving bear.")
@@ -1,12 +1,15 @@
 # pages/game.py
 
+import functools
 import os
 import json
 import base64
 import random
+from pathlib import Path
 from typing import Dict, List
 
 import requests
+from requests.adapters import HTTPAdapter
 import streamlit as st
 import streamlit.components.v1 as components
 
@@ -78,12 +81,25 @@ LEVEL_GRAPHEMES: Dict[int, List[str]] = {
 # ---------------------------------------------------------------------
 # HELPERS
 # ---------------------------------------------------------------------
+@st.cache_resource(show_spinner=False)
+def _http() -> requests.Session:
+    """Shared keepalive session — one TCP pool for all reruns and users."""
+    s = requests.Session()
+    s.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+    return s
+
+
+@st.cache_data(ttl=2, show_spinner=False)
+def _fetch_xp() -> int:
+    r = _http().get(f"{BACKEND_URL}/xp", timeout=2)
+    r.raise_for_status()
+    return int(r.json().get("xp", 0))
+
+
 def sync_xp_from_backend() -> int:
-    """Read XP from FastAPI backend."""
+    """Read XP from FastAPI backend (cached for 2 s across reruns)."""
     try:
-        r = requests.get(f"{BACKEND_URL}/xp", timeout=2)
-        r.raise_for_status()
-        return int(r.json().get("xp", 0))
+        return _fetch_xp()
     except Exception:
         return st.session_state.xp
 
@@ -98,29 +114,43 @@ def get_max_unlocked_level() -> int:
     return max_level
 
 
-def _first_existing(paths: List[str]):
+@functools.lru_cache(maxsize=8)
+def _first_existing(paths: tuple) -> str | None:
     for p in paths:
         if os.path.exists(p):
             return p
     return None
 
 
-def _b64(path: str) -> str | None:
-    if not path or not os.path.exists(path):
+@st.cache_data(show_spinner=False)
+def _b64_data_url(path: str, mtime: float) -> str | None:
+    # Path already vetted by _first_existing — no second stat call.
+    # Cached so the file is read and encoded once per process, not per
+    # rerun; mtime participates in the cache key so editing the image
+    # invalidates the entry automatically.
+    if not path:
         return None
-    with open(path, "rb") as f:
-        return base64.b64encode(f.read()).decode("utf-8")
+    mime = "image/webp" if path.endswith(".webp") else "image/png"
+    try:
+        encoded = base64.b64encode(Path(path).read_bytes()).decode("utf-8")
+    except OSError:
+        return None
+    return f"data:{mime};base64,{encoded}"
 
 
 # ---------------------------------------------------------------------
 # BACKGROUND IMAGE (forest)
 # ---------------------------------------------------------------------
-BG_PATHS = ["phonics_phorest.png", "assets/phonics_phorest.png"]
+BG_PATHS = (
+    "static/phonics_phorest.webp",
+    "static/phonics_phorest.png",
+    "phonics_phorest.png",
+    "assets/phonics_phorest.png",
+)
 BG_FILE = _first_existing(BG_PATHS)
-BG_B64 = _b64(BG_FILE) if BG_FILE else None
-BG_URL = f"data:image/png;base64,{BG_B64}" if BG_B64 else ""
+BG_URL = (_b64_data_url(BG_FILE, os.path.getmtime(BG_FILE)) or "") if BG_FILE else ""
 
-if not BG_B64:
+if not BG_URL:
     st.warning(
         "Background image **phonics_phorest.png** not found. "
         "Put it next to `main.py` or in `assets/`."
@@ -149,8 +179,12 @@ st.markdown(
         background-position: center;
     }}
     .level-overlay {{
-        backdrop-filter: blur(16px);
-        -webkit-backdrop-filter: blur(16px);
+        /* blur(16px) over a ~1040px panel is brutal on classroom iGPUs;
+           6px reads the same over the 0.9-alpha backing color. */
+        backdrop-filter: blur(6px);
+        -webkit-backdrop-filter: blur(6px);
+        contain: paint;
+        will-change: transform;
         background: rgba(15,23,42,0.9);
         border-radius: 28px;
         padding: 30px 34px 24px 34px;
@@ -167,7 +201,10 @@ st.markdown(
 # ---------------------------------------------------------------------
 # SIDEBAR – XP DEBUG ONLY
 # ---------------------------------------------------------------------
-with st.sidebar:
+# Own fragment: slider moves rerun just this block, and level/map
+# interactions don't re-trigger the backend XP sync.
+@st.fragment
+def _sidebar_controls():
     st.title("Tutor Controls")
     st.caption("XP debug only (students won’t see this).")
     debug_xp = st.slider(
@@ -181,10 +218,14 @@ with st.sidebar:
     if debug_xp != st.session_state.xp:
         st.session_state.xp = debug_xp
         try:
-            requests.post(f"{BACKEND_URL}/xp", json={"xp": int(debug_xp)}, timeout=2)
+            _http().post(f"{BACKEND_URL}/xp", json={"xp": int(debug_xp)}, timeout=2)
         except Exception:
             pass
 
+
+with st.sidebar:
+    _sidebar_controls()
+
 # ---------------------------------------------------------------------
 # SIMPLE CVC WORD BANK
 # ---------------------------------------------------------------------
@@ -204,44 +245,48 @@ STATIC_CVC_WORDS = [
 ]
 
 
-def build_wordbank(gpc: str) -> List[str]:
-    """3-letter word bank, biased to start with the grapheme when given."""
-    base = STATIC_CVC_WORDS.copy()
-    random.shuffle(base)
+@st.cache_data(show_spinner=False)
+def _wordbanks() -> Dict[str, tuple]:
+    """Partition the CVC bank once per grapheme: (starts, contains, others).
 
-    g = (gpc or "").strip().lower()
-    if not g:
-        return base
+    STATIC_CVC_WORDS and LEVEL_GRAPHEMES are constants, so the string
+    scans run a single time per process instead of once per round.
+    """
+    banks: Dict[str, tuple] = {}
+    for graphemes in LEVEL_GRAPHEMES.values():
+        for g in graphemes:
+            if g in banks:
+                continue
+            starts = [w for w in STATIC_CVC_WORDS if w.startswith(g)]
+            contains = [w for w in STATIC_CVC_WORDS if g in w and not w.startswith(g)]
+            others = [w for w in STATIC_CVC_WORDS if g not in w]
+            banks[g] = (starts, contains, others)
+    return banks
 
-    starts = [w for w in base if w.startswith(g)]
-    contains = [w for w in base if g in w and not w.startswith(g)]
-    others = [w for w in base if g not in w]
 
-    weighted: List[str] = []
-    weighted.extend(starts * 3)
-    weighted.extend(contains * 2)
-    weighted.extend(others)
-    weighted = weighted or base
-    random.shuffle(weighted)
-    return weighted
+@st.cache_data(show_spinner=False)
+def _weighted_pools() -> Dict[str, List[str]]:
+    """Per-grapheme sampling pool: starts ×3, contains ×2, others ×1."""
+    pools: Dict[str, List[str]] = {}
+    for g, (starts, contains, others) in _wordbanks().items():
+        pools[g] = (starts * 3 + contains * 2 + others) or list(STATIC_CVC_WORDS)
+    return pools
 
 
 def generate_rounds_for_level(level: int, n: int) -> List[Dict]:
     """Each round has: target, decoys, and a focus grapheme/phoneme label."""
     graphemes = LEVEL_GRAPHEMES.get(level, LEVEL_GRAPHEMES[1])
+    pools = _weighted_pools()
     rounds: List[Dict] = []
 
     for _ in range(n):
         gpc = random.choice(graphemes)
-        bank = build_wordbank(gpc)
-        if len(bank) < 3:
-            bank = STATIC_CVC_WORDS.copy()
-            random.shuffle(bank)
-
-        random.shuffle(bank)
-        target = bank[0]
-        d1 = bank[1]
-        d2 = bank[2]
+        pool = pools.get(gpc) or STATIC_CVC_WORDS
+        if len(pool) < 3:
+            pool = STATIC_CVC_WORDS
+        # One O(3) sample from the weighted pool replaces the old pair of
+        # full Fisher-Yates shuffles per round.
+        target, d1, d2 = random.sample(pool, 3)
         rounds.append({"target": target, "decoys": [d1, d2], "focus": gpc})
 
     return rounds
@@ -350,7 +395,7 @@ def level_select_screen():
                 ):
                     st.session_state.current_level = lvl
                     st.session_state.show_game = True
-                    st.rerun()
+                    st.rerun(scope="app")  # escape the map fragment
                 level_card(lvl, xp, thresholds, unlocked)
 
     st.caption(
@@ -360,64 +405,28 @@ def level_select_screen():
 
 
 # ---------------------------------------------------------------------
-# SHOW LEVEL MAP OR GAME
-# ---------------------------------------------------------------------
-if not st.session_state.show_game:
-    level_select_screen()
-    st.stop()
-
-# ---------------------------------------------------------------------
-# IN-LEVEL HEADER
-# ---------------------------------------------------------------------
-top_cols = st.columns([1, 2, 1])
-with top_cols[0]:
-    if st.button("⬅️ Back to Level Map"):
-        st.session_state.show_game = False
-        st.rerun()
-
-with top_cols[1]:
-    st.markdown(
-        f"<h3 style='text-align:center; color:#e5e7eb; font-size:24px;'>"
-        f"{LEVEL_NAMES[st.session_state.current_level]} "
-        f"(Level {st.session_state.current_level})</h3>",
-        unsafe_allow_html=True,
-    )
-
-with top_cols[2]:
-    st.markdown(
-        f"<div style='text-align:right; color:#e5e7eb; font-size:14px;'>XP: "
-        f"<b>{st.session_state.xp}</b></div>",
-        unsafe_allow_html=True,
-    )
-
-current_level = st.session_state.current_level
-
-# ---------------------------------------------------------------------
-# BUILD ROUNDS FOR THIS LEVEL
-# ---------------------------------------------------------------------
-ROUNDS = generate_rounds_for_level(current_level, n=18)
-ROUNDS_B64 = base64.b64encode(json.dumps(ROUNDS).encode("utf-8")).decode("utf-8")
-
-# ---------------------------------------------------------------------
-# APPLE GAME
+# APPLE GAME TEMPLATE
 # ---------------------------------------------------------------------
-html = f"""
+# Static skeleton with {{PLACEHOLDERS}}; only the handful of dynamic
+# values are substituted per run, instead of re-interpolating the whole
+# multi-KB f-string on every rerun.
+_GAME_TEMPLATE = """
 <!doctype html>
 <html>
 <head>
 <meta charset="utf-8" />
 <meta name="viewport" content="width=device-width, initial-scale=1" />
-<title>Phonics Phorest – Level {current_level}</title>
+<title>Phonics Phorest – Level {{LEVEL}}</title>
 <style>
-  html, body {{
+  html, body {
     margin: 0;
     padding: 0;
     overflow: hidden;
     font-family: system-ui, -apple-system, Segoe UI, Roboto, sans-serif;
     background: transparent;
     height: 100%;
-  }}
-  #wrap {{
+  }
+  #wrap {
     position: relative;
     width: 100%;
     max-width: 1200px;
@@ -425,14 +434,14 @@ html = f"""
     margin: 6px auto 0 auto;
     border-radius: 24px;
     overflow: hidden;
-  }}
-  #game {{
+  }
+  #game {
     display: block;
     width: 100%;
     height: 100%;
     background: transparent;
-  }}
-  #tap {{
+  }
+  #tap {
     position: absolute;
     inset: 0;
     display: flex;
@@ -445,8 +454,8 @@ html = f"""
     letter-spacing: .3px;
     text-align: center;
     padding: 14px;
-  }}
-  .hud {{
+  }
+  .hud {
     position: absolute;
     left: 10px;
     bottom: 10px;
@@ -457,8 +466,8 @@ html = f"""
     font-weight: 800;
     font-size: 14px;
     box-shadow: 0 8px 18px rgba(0,0,0,.2);
-  }}
-  .toast {{
+  }
+  .toast {
     position: absolute;
     right: 10px;
     top: 10px;
@@ -469,8 +478,8 @@ html = f"""
     display: none;
     font-weight: 800;
     font-size: 13px;
-  }}
-  .overlay {{
+  }
+  .overlay {
     position: absolute;
     inset: 0;
     display: none;
@@ -480,17 +489,17 @@ html = f"""
     color: #fff;
     text-align: center;
     padding: 20px;
-  }}
-  .overlay.show {{ display: flex; }}
-  .card {{
+  }
+  .overlay.show { display: flex; }
+  .card {
     background: rgba(20,20,20,.92);
     border: 1px solid rgba(255,255,255,.2);
     border-radius: 18px;
     padding: 18px 22px;
     max-width: 520px;
     font-size: 16px;
-  }}
-  .card button {{
+  }
+  .card button {
     margin-top: 12px;
     padding: 8px 16px;
     border-radius: 10px;
@@ -500,14 +509,14 @@ html = f"""
     color: #0a0a0a;
     font-weight: 800;
     font-size: 15px;
-  }}
+  }
 </style>
 </head>
 <body>
 <div id="wrap">
   <canvas id="game"></canvas>
   <div id="tap">Click or tap to start (turns on sound)</div>
-  <div class="hud">★ XP: <span id="xp">{st.session_state.xp}</span> · Move basket with ←/→ or A/D</div>
+  <div class="hud">★ XP: <span id="xp">{{XP}}</span> · Move basket with ←/→ or A/D</div>
   <div class="toast" id="toast">+10 XP</div>
   <div id="pause" class="overlay">
     <div class="card">
@@ -519,43 +528,44 @@ html = f"""
   </div>
 </div>
 
+<script id="rounds" type="application/json">{{ROUNDS_JSON}}</script>
 <script>
   // ===== DATA FROM PYTHON =====
-  const ROUNDS = JSON.parse(atob("{ROUNDS_B64}"));
-  const BG_URL = {json.dumps(BG_URL)};
-  const BACKEND_URL = {json.dumps(BACKEND_URL)};
-  let XP = {st.session_state.xp};
-  const LEVEL = {current_level};
+  const ROUNDS = JSON.parse(document.getElementById("rounds").textContent);
+  const BG_URL = {{BG_URL_JSON}};
+  const BACKEND_URL = {{BACKEND_URL_JSON}};
+  let XP = {{XP}};
+  const LEVEL = {{LEVEL}};
 
   // ===== XP HUD + BACKEND SYNC =====
   const xpEl = document.getElementById("xp");
   const toastEl = document.getElementById("toast");
 
-  function updateHUD() {{
+  function updateHUD() {
     xpEl.textContent = XP;
-  }}
+  }
 
-  async function syncXP() {{
-    try {{
-      await fetch(BACKEND_URL + "/xp", {{
+  async function syncXP() {
+    try {
+      await fetch(BACKEND_URL + "/xp", {
         method: "POST",
-        headers: {{ "Content-Type": "application/json" }},
-        body: JSON.stringify({{ xp: XP }})
-      }});
-    }} catch (e) {{
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ xp: XP })
+      });
+    } catch (e) {
       console.warn("XP sync failed", e);
-    }}
-  }}
+    }
+  }
 
-  function changeXP(amount, message) {{
+  function changeXP(amount, message) {
     XP += amount;
     if (XP < 0) XP = 0;
     updateHUD();
     syncXP();
     toastEl.textContent = message;
     toastEl.style.display = "block";
-    setTimeout(() => {{ toastEl.style.display = "none"; }}, 1000);
-  }}
+    setTimeout(() => { toastEl.style.display = "none"; }, 1000);
+  }
 
   updateHUD();
 
@@ -563,65 +573,105 @@ html = f"""
   const cvs = document.getElementById("game");
   const ctx = cvs.getContext("2d");
 
-  function resize() {{
+  function resize() {
     const rect = document.getElementById("wrap").getBoundingClientRect();
     cvs.width = rect.width;
     cvs.height = rect.height;
-  }}
+    rebuildLayout();
+    rebuildBGCache();
+    dirty = true;
+  }
   window.addEventListener("resize", resize);
-  resize();
+  // initial resize() runs after LAYOUT/LANES are declared below
 
   let bgImg = null;
-  if (BG_URL) {{
+  if (BG_URL) {
     bgImg = new Image();
+    bgImg.onload = () => { rebuildBGCache(); dirty = true; };
     bgImg.src = BG_URL;
-  }}
-
-  function drawForestBG() {{
+  }
+
+  // Scale the source image once per resize into an offscreen canvas so
+  // the per-frame background draw is a plain 1:1 blit, not a resample.
+  let bgCache = null;
+  function rebuildBGCache() {
+    if (!bgImg || !bgImg.complete || !bgImg.naturalWidth || !cvs.width || !cvs.height) {
+      bgCache = null;
+      return;
+    }
     const w = cvs.width, h = cvs.height;
+    const cache = (typeof OffscreenCanvas !== "undefined")
+      ? new OffscreenCanvas(w, h)
+      : Object.assign(document.createElement("canvas"), { width: w, height: h });
+    const bctx = cache.getContext("2d");
+    const iw = bgImg.naturalWidth, ih = bgImg.naturalHeight;
+    const s = Math.max(w / iw, h / ih);
+    const dw = Math.floor(iw * s), dh = Math.floor(ih * s);
+    bctx.drawImage(bgImg, Math.floor((w - dw) / 2), Math.floor((h - dh) / 2), dw, dh);
+    bgCache = cache;
+  }
+
+  function drawForestBG() {
     ctx.fillStyle = "#8fd19a";
-    ctx.fillRect(0, 0, w, h);
-    if (bgImg && bgImg.complete && bgImg.naturalWidth > 0) {{
-      const iw = bgImg.naturalWidth, ih = bgImg.naturalHeight;
-      const s = Math.max(w / iw, h / ih);
-      const dw = Math.floor(iw * s), dh = Math.floor(ih * s);
-      const dx = Math.floor((w - dw) / 2), dy = Math.floor((h - dh) / 2);
-      ctx.drawImage(bgImg, dx, dy, dw, dh);
-    }}
-  }}
+    ctx.fillRect(0, 0, cvs.width, cvs.height);
+    if (bgCache) {
+      ctx.drawImage(bgCache, 0, 0);
+    }
+  }
 
   // ===== BROWSER TTS =====
   let voice = null;
-  function pickVoice() {{
+  const VOICE_RE = /Samantha|Allison|Joanna|en-US/i;
+  function pickVoice() {
     const synth = window.speechSynthesis;
     if (!synth) return null;
     const voices = synth.getVoices();
     if (!voices || !voices.length) return null;
-    const prefs = voices.filter(v =>
-      /Samantha|Allison|Joanna|en-US/i.test(v.name + " " + v.lang)
-    );
+    const prefs = voices.filter(v => VOICE_RE.test(v.name + " " + v.lang));
     return prefs[0] || voices[0];
-  }}
-
-  function speak(text, onend) {{
-    if (!window.speechSynthesis) {{
+  }
+  // Voices load asynchronously; resolve once now and again when the
+  // list arrives, instead of re-running the regex scan on every speak.
+  if (window.speechSynthesis) {
+    window.speechSynthesis.onvoiceschanged = () => { voice = pickVoice(); };
+    voice = pickVoice();
+  }
+
+  function speak(text, onend) {
+    if (!window.speechSynthesis) {
       if (onend) setTimeout(onend, 10);
       return;
-    }}
-    if (!voice) voice = pickVoice();
+    }
     const u = new SpeechSynthesisUtterance(text);
     if (voice) u.voice = voice;
     u.rate = 0.65;  // calm teacher pace
     u.pitch = 1.0;
     u.onend = () => onend && onend();
     window.speechSynthesis.speak(u);
-  }}
+  }
 
   // ===== GAME STATE =====
   const LANES = [0.2, 0.5, 0.8];
   let basketLane = 1;
   const basketYRel = 0.88;
 
+  // Layout constants recomputed only on resize, not per frame.
+  const LAYOUT = { radius: 40, basketW: 0, basketH: 0, laneXs: [0, 0, 0], announceY: 0, basketY: 0 };
+  function rebuildLayout() {
+    LAYOUT.radius = Math.max(40, Math.floor(cvs.height * 0.10));
+    LAYOUT.basketW = Math.floor(cvs.width * 0.18);
+    LAYOUT.basketH = Math.floor(cvs.height * 0.06);
+    LAYOUT.laneXs = LANES.map(l => Math.floor(cvs.width * l));
+    LAYOUT.announceY = Math.floor(cvs.height * 0.22);
+    LAYOUT.basketY = Math.floor(cvs.height * basketYRel);
+  }
+  // Redraw gate: while nothing moves (e.g. during the TTS announce)
+  // frames are skipped entirely instead of re-blitting the scene.
+  // Declared before the initial resize(), which sets it.
+  let dirty = true;
+
+  resize();
+
   let roundIdx = 0;
   let current = null;
   let currentMeta = null;
@@ -633,298 +683,355 @@ html = f"""
   let roundActive = false;
   let waitingForNext = false;
 
-  const confetti = [];
-
-  function laneX(i) {{ return Math.floor(cvs.width * LANES[i]); }}
-  function relY(r) {{ return Math.floor(cvs.height * r); }}
-
-  function drawApple(x, y, text, lane) {{
-    const radius = Math.max(40, Math.floor(cvs.height * 0.10)); // BIG APPLES
-
-    // highlight ring when reading
-    if (highlightLane === lane) {{
-      ctx.lineWidth = Math.max(4, Math.floor(radius * 0.22));
-      ctx.strokeStyle = "rgba(255, 221, 0, 0.95)";
-      ctx.beginPath();
-      ctx.arc(x, y, radius + Math.floor(radius * 0.3), 0, Math.PI * 2);
-      ctx.stroke();
-    }}
+  // Confetti in structure-of-arrays layout: parallel typed arrays keep
+  // the per-frame update a tight loop over contiguous memory instead of
+  // pointer-chasing ~90 heterogeneous objects.
+  const CONFETTI_CAP = 256;
+  const CONFETTI_COLORS = ["#f97316", "#22c55e", "#3b82f6", "#eab308", "#ec4899"];
+  const cfX = new Float32Array(CONFETTI_CAP);
+  const cfY = new Float32Array(CONFETTI_CAP);
+  const cfVX = new Float32Array(CONFETTI_CAP);
+  const cfVY = new Float32Array(CONFETTI_CAP);
+  const cfSize = new Float32Array(CONFETTI_CAP);
+  const cfLife = new Float32Array(CONFETTI_CAP);
+  const cfMax = new Float32Array(CONFETTI_CAP);
+  const cfColor = new Uint8Array(CONFETTI_CAP);
+  let cfCount = 0;
+
+  function laneX(i) { return LAYOUT.laneXs[i]; }
+  function relY(r) { return Math.floor(cvs.height * r); }
+
+  // The apple shape never changes — only the word and highlight ring do.
+  // Pre-render body + stem + leaf once per radius; each frame is then a
+  // single blit + fillText instead of four path builds per apple.
+  let appleSprite = null;
+  let appleSpriteRadius = 0;
+  function buildAppleSprite(radius) {
+    const side = Math.ceil(radius * 2.8);
+    const sprite = (typeof OffscreenCanvas !== "undefined")
+      ? new OffscreenCanvas(side, side)
+      : Object.assign(document.createElement("canvas"), { width: side, height: side });
+    const sctx = sprite.getContext("2d");
+    const cx = side / 2, cy = side / 2;
 
     // apple body
-    ctx.fillStyle = "#e11d48";
-    ctx.beginPath();
-    ctx.arc(x, y, radius, 0, Math.PI * 2);
-    ctx.fill();
+    sctx.fillStyle = "#e11d48";
+    sctx.beginPath();
+    sctx.arc(cx, cy, radius, 0, Math.PI * 2);
+    sctx.fill();
 
     // stem
-    ctx.strokeStyle = "#4b5563";
-    ctx.lineWidth = Math.max(3, Math.floor(radius * 0.08));
-    ctx.beginPath();
-    ctx.moveTo(x, y - radius * 0.9);
-    ctx.lineTo(x, y - radius * 1.3);
-    ctx.stroke();
+    sctx.strokeStyle = "#4b5563";
+    sctx.lineWidth = Math.max(3, Math.floor(radius * 0.08));
+    sctx.beginPath();
+    sctx.moveTo(cx, cy - radius * 0.9);
+    sctx.lineTo(cx, cy - radius * 1.3);
+    sctx.stroke();
 
     // leaf
-    ctx.fillStyle = "#22c55e";
-    ctx.beginPath();
-    ctx.ellipse(
-      x + radius * 0.55,
-      y - radius * 1.0,
+    sctx.fillStyle = "#22c55e";
+    sctx.beginPath();
+    sctx.ellipse(
+      cx + radius * 0.55,
+      cy - radius * 1.0,
       radius * 0.45,
       radius * 0.25,
       -0.6,
       0,
       Math.PI * 2
     );
-    ctx.fill();
+    sctx.fill();
+
+    appleSprite = sprite;
+    appleSpriteRadius = radius;
+  }
+
+  function drawApple(x, y, text, lane) {
+    const radius = LAYOUT.radius; // BIG APPLES
+    if (appleSpriteRadius !== radius) buildAppleSprite(radius);
+
+    // highlight ring when reading
+    if (highlightLane === lane) {
+      ctx.lineWidth = Math.max(4, (radius * 0.22) | 0);
+      ctx.strokeStyle = "rgba(255, 221, 0, 0.95)";
+      ctx.beginPath();
+      ctx.arc(x, y, radius + ((radius * 0.3) | 0), 0, Math.PI * 2);
+      ctx.stroke();
+    }
+
+    ctx.drawImage(appleSprite, x - appleSprite.width / 2, y - appleSprite.height / 2);
 
     // word text
     ctx.fillStyle = "#fff";
-    ctx.font = "bold " + Math.floor(radius * 0.9) + "px system-ui";
+    ctx.font = "bold " + ((radius * 0.9) | 0) + "px system-ui";
     ctx.textAlign = "center";
-    ctx.fillText(text, x, y + Math.floor(radius * 0.2));
-  }}
+    ctx.fillText(text, x, y + ((radius * 0.2) | 0));
+  }
 
-  function drawBasket() {{
-    const w = Math.floor(cvs.width * 0.18);
-    const h = Math.floor(cvs.height * 0.06);
-    const x = laneX(basketLane) - Math.floor(w / 2);
-    const y = relY(basketYRel);
+  function drawBasket() {
+    const w = LAYOUT.basketW;
+    const h = LAYOUT.basketH;
+    const x = laneX(basketLane) - ((w / 2) | 0);
+    const y = LAYOUT.basketY;
 
     // basket base
     ctx.fillStyle = "#5d3a00";
     ctx.fillRect(x, y, w, h);
 
     // woven body
-    const bodyH = Math.floor(h * 1.1);
+    const bodyH = (h * 1.1) | 0;
     ctx.fillStyle = "#8b5a12";
     ctx.fillRect(
-      x + Math.floor(w * 0.06),
+      x + ((w * 0.06) | 0),
       y - bodyH,
-      Math.floor(w * 0.88),
+      (w * 0.88) | 0,
       bodyH
     );
 
     // simple slats
     ctx.strokeStyle = "#a16207";
     ctx.lineWidth = 3;
-    for (let i = 0; i < 4; i++) {{
-      const sx = x + Math.floor(w * 0.12) + i * Math.floor(w * 0.16);
+    for (let i = 0; i < 4; i++) {
+      const sx = x + ((w * 0.12) | 0) + i * ((w * 0.16) | 0);
       ctx.beginPath();
       ctx.moveTo(sx, y - bodyH);
       ctx.lineTo(sx, y);
       ctx.stroke();
-    }}
-
-    return {{x, y, w, h}};
-  }}
+    }
 
-  function overlap(ax, ay, aw, ah, bx, by, bw, bh) {{
-    return !(
-      bx > ax + aw ||
-      bx + bw < ax ||
-      by > ay + ah ||
-      by + bh < ay
-    );
-  }}
-
-  function spawnConfetti(x, y) {{
-    const colors = ["#f97316", "#22c55e", "#3b82f6", "#eab308", "#ec4899"];
-    for (let i = 0; i < 90; i++) {{
-      confetti.push({{
-        x: x + (Math.random() - 0.5) * 40,
-        y: y + (Math.random() - 0.5) * 20,
-        vx: (Math.random() - 0.5) * 160,
-        vy: -Math.random() * 240,
-        size: 3 + Math.random() * 3,
-        color: colors[Math.floor(Math.random() * colors.length)],
-        life: 0,
-        maxLife: 1.2 + Math.random() * 0.7
-      }});
-    }}
-  }}
+    return {x, y, w, h};
+  }
+
+  function spawnConfetti(x, y) {
+    for (let i = 0; i < 90 && cfCount < CONFETTI_CAP; i++) {
+      const n = cfCount++;
+      cfX[n] = x + (Math.random() - 0.5) * 40;
+      cfY[n] = y + (Math.random() - 0.5) * 20;
+      cfVX[n] = (Math.random() - 0.5) * 160;
+      cfVY[n] = -Math.random() * 240;
+      cfSize[n] = 3 + Math.random() * 3;
+      cfColor[n] = (Math.random() * CONFETTI_COLORS.length) | 0;
+      cfLife[n] = 0;
+      cfMax[n] = 1.2 + Math.random() * 0.7;
+    }
+    dirty = true;
+  }
 
   // ===== ROUND LOGIC =====
-  function buildCurrentFromMeta(meta) {{
+  function buildCurrentFromMeta(meta) {
     const words = [meta.target, meta.decoys[0], meta.decoys[1]];
     // shuffle words
-    for (let i = words.length - 1; i > 0; i--) {{
+    for (let i = words.length - 1; i > 0; i--) {
       const j = Math.floor(Math.random() * (i + 1));
       [words[i], words[j]] = [words[j], words[i]];
-    }}
+    }
     const correctLane = words.indexOf(meta.target);
-    current = {{
+    current = {
       target: meta.target,
       words,
       correctLane,
       focus: meta.focus
-    }};
+    };
 
     fallYRel = [-0.12, -0.12, -0.12];
     announcing = true;
     highlightLane = -1;
     roundActive = false;
-  }}
+    dirty = true;
+  }
 
-  function startRound(newRound) {{
-    if (newRound || !currentMeta) {{
+  function startRound(newRound) {
+    if (newRound || !currentMeta) {
       if (roundIdx >= ROUNDS.length) roundIdx = 0;
       currentMeta = ROUNDS[roundIdx++];
-    }}
+    }
     buildCurrentFromMeta(currentMeta);
 
     const target = currentMeta.target;
     const words = current.words;
 
-    // TTS sequence: instruct, then read each word twice.
-    speak("Listen. You will hear three words. Catch the word " + target + ".", () => {{
-      let idx = 0;
-      function speakWordTwice() {{
-        if (idx >= words.length) {{
-          announcing = false;
-          highlightLane = -1;
-          roundActive = true;
-          return;
-        }}
-        const w = words[idx];
-        highlightLane = idx;
-        speak(w, () => {{
-          speak(w, () => {{
-            highlightLane = -1;
-            idx += 1;
-            setTimeout(speakWordTwice, 120);  // small pause
-          }});
-        }});
-      }}
-      speakWordTwice();
-    }});
-  }}
+    // TTS sequence: instruct, then read each word twice. All utterances
+    // are queued up front and the browser's native speech queue drives
+    // them — no nested callbacks, no setTimeout drift between words.
+    if (!window.speechSynthesis) {
+      announcing = false;
+      highlightLane = -1;
+      roundActive = true;
+      return;
+    }
+    const utters = [];
+    function u(text, lane) {
+      const ut = new SpeechSynthesisUtterance(text);
+      if (voice) ut.voice = voice;
+      ut.rate = 0.65;  // calm teacher pace
+      ut.pitch = 1.0;
+      ut.onstart = () => { highlightLane = lane; dirty = true; };
+      utters.push(ut);
+      return ut;
+    }
+    u("Listen. You will hear three words. Catch the word " + target + ".", -1);
+    for (let i = 0; i < words.length; i++) {
+      u(words[i], i);
+      u(words[i], i);
+    }
+    utters[utters.length - 1].onend = () => {
+      highlightLane = -1;
+      announcing = false;
+      roundActive = true;
+      dirty = true;
+    };
+    for (const ut of utters) window.speechSynthesis.speak(ut);
+  }
 
   // ===== INPUT =====
-  document.addEventListener("keydown", (e) => {{
+  // e.code needs no per-event string allocation (unlike key.toLowerCase),
+  // which matters under key autorepeat.
+  const KEY_DELTA = Object.freeze({ ArrowLeft: -1, KeyA: -1, ArrowRight: 1, KeyD: 1 });
+  document.addEventListener("keydown", (e) => {
     if (!roundActive) return;
-    const k = e.key.toLowerCase();
-    if (k === "arrowleft" || k === "a") {{
-      basketLane = Math.max(0, basketLane - 1);
-    }} else if (k === "arrowright" || k === "d") {{
-      basketLane = Math.min(2, basketLane + 1);
-    }}
-  }});
+    const d = KEY_DELTA[e.code];
+    if (d) {
+      basketLane = Math.max(0, Math.min(2, basketLane + d));
+      dirty = true;
+    }
+  });
 
   const resumeBtn = document.getElementById("resumeBtn");
   const pauseEl = document.getElementById("pause");
   const pauseText = document.getElementById("pauseText");
 
-  resumeBtn.onclick = () => {{
+  resumeBtn.onclick = () => {
     pauseEl.classList.remove("show");
     waitingForNext = false;
     startRound(false);   // retry same word
-  }};
+  };
 
   const tap = document.getElementById("tap");
-  tap.addEventListener("click", () => {{
+  tap.addEventListener("click", () => {
     tap.style.display = "none";
     startRound(true);
     last = performance.now();
     requestAnimationFrame(tick);
-  }});
+  });
 
   // ===== CONFETTI UPDATE =====
-  function updateConfetti(dt) {{
-    for (let i = confetti.length - 1; i >= 0; i--) {{
-      const p = confetti[i];
-      p.life += dt;
-      if (p.life > p.maxLife) {{
-        confetti.splice(i, 1);
+  function updateConfetti(dt) {
+    for (let i = 0; i < cfCount; i++) {
+      cfLife[i] += dt;
+      if (cfLife[i] > cfMax[i]) {
+        // swap-pop the last live particle into this slot
+        const n = --cfCount;
+        cfX[i] = cfX[n]; cfY[i] = cfY[n];
+        cfVX[i] = cfVX[n]; cfVY[i] = cfVY[n];
+        cfSize[i] = cfSize[n]; cfColor[i] = cfColor[n];
+        cfLife[i] = cfLife[n]; cfMax[i] = cfMax[n];
+        i--;
         continue;
-      }}
-      p.vy += 340 * dt;
-      p.x += p.vx * dt;
-      p.y += p.vy * dt;
-    }}
-  }}
-
-  function drawConfetti() {{
-    confetti.forEach(p => {{
-      const alpha = Math.max(0, 1 - p.life / p.maxLife);
-      ctx.fillStyle = p.color;
-      ctx.globalAlpha = alpha;
-      ctx.fillRect(p.x, p.y, p.size, p.size);
-      ctx.globalAlpha = 1;
-    }});
-  }}
+      }
+      cfVY[i] += 340 * dt;
+      cfX[i] += cfVX[i] * dt;
+      cfY[i] += cfVY[i] * dt;
+    }
+  }
+
+  function drawConfetti() {
+    if (!cfCount) return;
+    // One Path2D per color: ~5 fill calls per frame instead of a style
+    // change + fillRect per particle. The fade is applied per batch
+    // (average remaining life) rather than per particle.
+    const paths = [null, null, null, null, null];
+    let alphaSum = 0;
+    for (let i = 0; i < cfCount; i++) {
+      const k = cfColor[i];
+      if (!paths[k]) paths[k] = new Path2D();
+      paths[k].rect(cfX[i], cfY[i], cfSize[i], cfSize[i]);
+      alphaSum += 1 - cfLife[i] / cfMax[i];
+    }
+    ctx.globalAlpha = Math.max(0, Math.min(1, alphaSum / cfCount));
+    for (let k = 0; k < CONFETTI_COLORS.length; k++) {
+      if (paths[k]) {
+        ctx.fillStyle = CONFETTI_COLORS[k];
+        ctx.fill(paths[k]);
+      }
+    }
+    ctx.globalAlpha = 1;
+  }
 
   // ===== MAIN LOOP =====
   let last = performance.now();
 
-  function tick(ts) {{
+  function tick(ts) {
+    requestAnimationFrame(tick);
     const dt = (ts - last) / 1000;
     last = ts;
 
+    const falling = roundActive && !announcing && !waitingForNext;
+    if (!dirty && !falling && !cfCount) {
+      return;  // static frame — skip the whole draw body
+    }
+    dirty = false;
+
     ctx.clearRect(0, 0, cvs.width, cvs.height);
     drawForestBG();
 
-    if (!current) {{
-      requestAnimationFrame(tick);
+    if (!current) {
       return;
-    }}
+    }
 
     // draw apples
-    for (let i = 0; i < 3; i++) {{
-      const y = announcing ? relY(0.22) : relY(fallYRel[i]);
+    for (let i = 0; i < 3; i++) {
+      const y = announcing ? LAYOUT.announceY : relY(fallYRel[i]);
       drawApple(laneX(i), y, current.words[i], i);
-    }}
+    }
 
     const basket = drawBasket();
 
-    if (roundActive && !announcing && !waitingForNext) {{
-      for (let i = 0; i < 3; i++) {{
+    if (roundActive && !announcing && !waitingForNext) {
+      for (let i = 0; i < 3; i++) {
         fallYRel[i] += fallSpeed * dt;
-      }}
-
-      const radius = Math.max(40, Math.floor(cvs.height * 0.10));
-      const aw = radius * 2;
-      const ah = radius * 2;
-
-      // check ALL apples vs basket
-      for (let i = 0; i < 3; i++) {{
+      }
+
+      const radius = LAYOUT.radius;
+      const bxr = basket.x + basket.w;
+      const byb = basket.y + basket.h;
+
+      // check ALL apples vs basket — inline AABB test, no call overhead.
+      // Apples never leave their lanes, so the x half of the test only
+      // changes when the basket moves; most frames fail it immediately.
+      for (let i = 0; i < 3; i++) {
+        const x = LAYOUT.laneXs[i];
+        if (x + radius <= basket.x || x - radius >= bxr) continue;
         const y = relY(fallYRel[i]);
-        const ax = laneX(i) - radius;
-        const ay = y - radius;
-        const hit = overlap(ax, ay, aw, ah, basket.x, basket.y, basket.w, basket.h);
-        if (hit) {{
-          const clickedWord = current.words[i];
-          const isCorrect = (i === current.correctLane);
-          handleCatch(isCorrect, clickedWord);
+        if (y + radius > basket.y && y - radius < byb) {
+          handleCatch(i === current.correctLane, current.words[i]);
           break;
-        }}
-      }}
+        }
+      }
 
       // if target falls past bottom → miss
       const targetY = relY(fallYRel[current.correctLane]);
-      if (targetY - radius > cvs.height + 4) {{
+      if (targetY - radius > cvs.height + 4) {
         const targetWord = current.words[current.correctLane];
         handleCatch(false, "__miss__" + targetWord);
-      }}
-    }}
+      }
+    }
 
     updateConfetti(dt);
     drawConfetti();
+  }
 
-    requestAnimationFrame(tick);
-  }}
-
-  function handleCatch(isCorrect, clickedWord) {{
+  function handleCatch(isCorrect, clickedWord) {
     if (!roundActive || waitingForNext) return;
     roundActive = false;
+    dirty = true;
 
     const word = current.target;
     const focus = current.focus || word[0];
 
-    if (isCorrect) {{
+    if (isCorrect) {
       // CORRECT → praise + confetti + +10 XP + explain
       const cx = laneX(basketLane);
-      const cy = relY(basketYRel);
+      const cy = LAYOUT.basketY;
       spawnConfetti(cx, cy);
 
       changeXP(10, "+10 XP 🎉");
@@ -934,51 +1041,134 @@ html = f"""
         "Listen: " + word + " starts with the " + focus + " sound.";
 
       waitingForNext = true;
-      speak(word, () => {{
-        speak(msg, () => {{
-          setTimeout(() => {{
+      speak(word, () => {
+        speak(msg, () => {
+          setTimeout(() => {
             waitingForNext = false;
             startRound(true);   // new word
-          }}, 900);
-        }});
-      }});
+          }, 900);
+        });
+      });
 
-    }} else {{
+    } else {
       // WRONG / MISSED → explain + -5 XP, retry same word
       changeXP(-5, "-5 XP · let's fix it");
 
       let caught = "";
-      if (clickedWord && !clickedWord.startsWith("__miss__")) {{
+      if (clickedWord && !clickedWord.startsWith("__miss__")) {
         caught = clickedWord;
-      }} else if (clickedWord && clickedWord.startsWith("__miss__")) {{
+      } else if (clickedWord && clickedWord.startsWith("__miss__")) {
         caught = ""; // they missed everything
-      }}
+      }
 
       let explain;
-      if (caught) {{
+      if (caught) {
         explain =
           "You caught " + caught + ". " +
           "But the target word was " + word + ". " +
           "Listen for the " + focus + " sound at the start of " + word + ".";
-      }} else {{
+      } else {
         explain =
           "The word was " + word + ". " +
           "You can listen again for the " + focus + " sound.";
-      }}
+      }
 
       pauseText.textContent = explain;
       waitingForNext = true;
       const overlay = document.getElementById("pause");
       overlay.classList.add("show");
 
-      speak(word, () => {{
+      speak(word, () => {
         speak(explain, null);
-      }});
-    }}
-  }}
+      });
+    }
+  }
 </script>
 </body>
 </html>
 """
 
-components.html(html, height=650, scrolling=False)
\ No newline at end of file
+
+@st.cache_data(show_spinner=False)
+def get_game_template() -> str:
+    return _GAME_TEMPLATE
+
+
+# ---------------------------------------------------------------------
+# IN-LEVEL VIEW
+# ---------------------------------------------------------------------
+# Fragment boundary: sidebar slider moves and other unrelated reruns
+# no longer rebuild the header + iframe; only level/game changes do.
+@st.fragment
+def _render_game():
+    # ---------------------------------------------------------------------
+    # IN-LEVEL HEADER
+    # ---------------------------------------------------------------------
+    top_cols = st.columns([1, 2, 1])
+    with top_cols[0]:
+        if st.button("⬅️ Back to Level Map"):
+            st.session_state.show_game = False
+            st.rerun(scope="app")
+
+    with top_cols[1]:
+        st.markdown(
+            f"<h3 style='text-align:center; color:#e5e7eb; font-size:24px;'>"
+            f"{LEVEL_NAMES[st.session_state.current_level]} "
+            f"(Level {st.session_state.current_level})</h3>",
+            unsafe_allow_html=True,
+        )
+
+    with top_cols[2]:
+        st.markdown(
+            f"<div style='text-align:right; color:#e5e7eb; font-size:14px;'>XP: "
+            f"<b>{st.session_state.xp}</b></div>",
+            unsafe_allow_html=True,
+        )
+
+    current_level = st.session_state.current_level
+
+    # ---------------------------------------------------------------------
+    # BUILD ROUNDS FOR THIS LEVEL
+    # ---------------------------------------------------------------------
+    # Rounds only need to change with the level — not on every slider move
+    # or button click. Regenerate (and re-encode) them only when the level
+    # the cached rounds were built for differs from the one being played.
+    if st.session_state.get("rounds_level") != current_level:
+        st.session_state.rounds = generate_rounds_for_level(current_level, n=18)
+        st.session_state.rounds_level = current_level
+        # Escape "</" so the payload can't close its <script> element early.
+        st.session_state.rounds_json = json.dumps(
+            st.session_state.rounds
+        ).replace("</", "<\\/")
+
+    ROUNDS_JSON = st.session_state.rounds_json
+
+    # ---------------------------------------------------------------------
+    # APPLE GAME
+    # ---------------------------------------------------------------------
+    html = (
+        get_game_template()
+        .replace("{{LEVEL}}", str(current_level))
+        .replace("{{XP}}", str(st.session_state.xp))
+        .replace("{{ROUNDS_JSON}}", ROUNDS_JSON)
+        .replace("{{BG_URL_JSON}}", json.dumps(BG_URL))
+        .replace("{{BACKEND_URL_JSON}}", json.dumps(BACKEND_URL))
+    )
+
+    components.html(html, height=650, scrolling=False)
+
+
+# ---------------------------------------------------------------------
+# SHOW LEVEL MAP OR GAME
+# ---------------------------------------------------------------------
+# Map and game each get their own rerun boundary; only the visible one
+# reruns in response to its own widget events.
+@st.fragment
+def _render_map():
+    level_select_screen()
+
+
+if not st.session_state.show_game:
+    _render_map()
+else:
+    _render_game()
@@ -1,10 +1,43 @@
+import hashlib
+import math
 import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict
 
+import httpx
 import numpy as np
 from PyPDF2 import PdfReader
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+import embed_cache
+
+# pdfium extracts text an order of magnitude faster than PyPDF2's pure
+# Python parser; fall back to PyPDF2 where the wheel isn't available.
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# Optional ANN index — brute force is fine for small corpora, so hnswlib
+# is not a hard dependency.
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# Optional JIT for the scalar cosine helper (the matrix paths below are
+# already BLAS-bound and don't benefit).
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Below this many chunks the exact scan is already fast; the graph build
+# isn't worth it.
+ANN_MIN_CHUNKS = 2000
 
 # ── load environment & create OpenAI client ─────────────────────────────
 
@@ -21,15 +54,64 @@ if not OPENAI_API_KEY:
         "Make sure it's in your .env or exported before running uvicorn."
     )
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Sync client for the one-shot startup KB build; async client for the
+# request path, so one slow OpenAI call never blocks the event loop and
+# concurrent /feedback requests overlap their network waits. Both ride
+# an HTTP/2 transport with a pool sized for the 8-way batch embedder,
+# so concurrent calls multiplex over a few warm connections instead of
+# paying a TLS handshake each.
+_HTTPX_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+
+client = OpenAI(
+    api_key=OPENAI_API_KEY,
+    http_client=httpx.Client(http2=True, limits=_HTTPX_LIMITS, timeout=30.0),
+)
+async_client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    http_client=httpx.AsyncClient(http2=True, limits=_HTTPX_LIMITS, timeout=30.0),
+)
 
 CHAT_MODEL = "gpt-4o-mini"
 EMBED_MODEL = "text-embedding-3-small"
+# text-embedding-3-small is Matryoshka-trained: the leading dimensions
+# carry most of the signal, so 512-d vectors score 3x faster than the
+# full 1536 with little retrieval loss. The API re-normalizes truncated
+# vectors, and the KB build normalizes again regardless.
+EMBED_DIMS = int(os.getenv("EMBED_DIMS", "512"))
+
+# Module-level so every request sends a byte-identical prefix, which
+# lets the API's prompt cache reuse it across requests.
+SYSTEM_PROMPT = (
+    "You are BrighterText, a dyslexia-friendly reading tutor. "
+    "You give feedback on student answers.\n\n"
+    "Rules:\n"
+    "- Use short sentences and simple words.\n"
+    "- Always be encouraging.\n"
+    "- First say what they did well.\n"
+    "- Then gently explain what is missing or incorrect.\n"
+    "- Show a short model answer.\n"
+    "- End with one small practice suggestion."
+)
 
 
 # ── helper: read PDF into text ───────────────────────────────────────────
 
 def pdf_to_text(file_path: str) -> str:
+    if pdfium is not None:
+        doc = pdfium.PdfDocument(file_path)
+        try:
+            pages = []
+            for page in doc:
+                textpage = page.get_textpage()
+                try:
+                    pages.append(textpage.get_text_range())
+                finally:
+                    textpage.close()
+                page.close()
+            return "\n\n".join(pages)
+        finally:
+            doc.close()
+
     reader = PdfReader(file_path)
     pages = []
     for page in reader.pages:
@@ -43,73 +125,410 @@ def pdf_to_text(file_path: str) -> str:
 # ── helper: chunk text into windows (by words) ───────────────────────────
 
 def chunk_text(text: str, words_per_chunk: int = 350) -> list[str]:
-    words = text.split()
+    # Slice the original string between word boundaries instead of
+    # rebuilding every window with " ".join — one copy per chunk rather
+    # than one per word.
+    spans = [m.span() for m in re.finditer(r"\S+", text)]
     chunks: list[str] = []
-    for i in range(0, len(words), words_per_chunk):
-        chunk = " ".join(words[i:i + words_per_chunk])
-        if chunk.strip():
-            chunks.append(chunk)
+    for i in range(0, len(spans), words_per_chunk):
+        window = spans[i:i + words_per_chunk]
+        chunks.append(text[window[0][0]:window[-1][1]])
     return chunks
 
 
+# ── streaming parse pipeline (pages -> words -> chunks) ──────────────────
+
+def iter_pdf_words(file_path: str):
+    """Yield words from a PDF one page at a time.
+
+    Unlike pdf_to_text, this never holds the whole document text (or its
+    word-span list) in memory — peak usage per worker is one page plus
+    one in-flight chunk.
+    """
+    if pdfium is not None:
+        doc = pdfium.PdfDocument(file_path)
+        try:
+            for page in doc:
+                textpage = page.get_textpage()
+                try:
+                    yield from textpage.get_text_range().split()
+                finally:
+                    textpage.close()
+                page.close()
+        finally:
+            doc.close()
+        return
+
+    reader = PdfReader(file_path)
+    for page in reader.pages:
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            text = ""
+        yield from text.split()
+
+
+def iter_chunks(words, words_per_chunk: int = 350):
+    """Group a word iterator into chunk strings of `words_per_chunk`."""
+    buf: list[str] = []
+    for word in words:
+        buf.append(word)
+        if len(buf) == words_per_chunk:
+            yield " ".join(buf)
+            buf.clear()
+    if buf:
+        yield " ".join(buf)
+
+
 # ── embeddings ───────────────────────────────────────────────────────────
 
+def _embed_key(text: str) -> str:
+    # Dimension count is part of the key so cached full-size vectors are
+    # never mixed with truncated ones.
+    return hashlib.sha256(
+        f"{EMBED_MODEL}:{EMBED_DIMS}\0{text}".encode("utf-8")
+    ).hexdigest()
+
+
 def embed_texts(texts: list[str]) -> list[list[float]]:
     if not texts:
         return []
-    resp = client.embeddings.create(
-        model=EMBED_MODEL,
-        input=texts,
-        encoding_format="float",
-    )
-    return [d.embedding for d in resp.data]
+
+    # Serve what we can from the on-disk cache; only cache misses go to
+    # the API. On a warm restart the whole KB build makes zero API calls.
+    keys = [_embed_key(t) for t in texts]
+    cached = embed_cache.get_many(keys)
+
+    miss_idx = [i for i, key in enumerate(keys) if key not in cached]
+    if miss_idx:
+        resp = client.embeddings.create(
+            model=EMBED_MODEL,
+            input=[texts[i] for i in miss_idx],
+            dimensions=EMBED_DIMS,
+            encoding_format="float",
+        )
+        fresh: dict = {}
+        for i, d in zip(miss_idx, resp.data):
+            vec = np.asarray(d.embedding, dtype="float32")
+            cached[keys[i]] = vec
+            fresh[keys[i]] = vec
+        embed_cache.put_many(fresh)
+
+    return [cached[key].tolist() for key in keys]
+
+
+def embed_texts_batched(texts: list[str], batch: int = 1024) -> list[list[float]]:
+    """Embed a large pool of texts in big batches, a few in flight at once.
+
+    One request per `batch` inputs instead of one per PDF; up to 8
+    batches run concurrently, bounded to stay under API rate limits.
+    """
+    if not texts:
+        return []
+    slices = [texts[i:i + batch] for i in range(0, len(texts), batch)]
+    if len(slices) == 1:
+        return embed_texts(slices[0])
+
+    results: list = [None] * len(slices)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = {pool.submit(embed_texts, s): i for i, s in enumerate(slices)}
+        for fut in as_completed(futures):
+            results[futures[fut]] = fut.result()
+    return [vec for part in results for vec in part]
+
+
+# In-process memo for query embeddings. functools.lru_cache can't wrap a
+# coroutine, so this is a small OrderedDict LRU in front of the SQLite
+# cache: repeat questions within a session skip even the disk lookup.
+_QUERY_CACHE_MAX = 256
+_query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+
+async def embed_query(text: str) -> np.ndarray:
+    """Embed a single query string on the async client.
+
+    Shares the on-disk cache with the batch path, so a question seen at
+    KB build time or on a previous request costs no API call.
+    """
+    key = _embed_key(text)
+    if key in _query_cache:
+        _query_cache.move_to_end(key)
+        return _query_cache[key]
+
+    cached = embed_cache.get_many([key])
+    if key in cached:
+        vec = cached[key]
+    else:
+        resp = await async_client.embeddings.create(
+            model=EMBED_MODEL,
+            input=[text],
+            dimensions=EMBED_DIMS,
+            encoding_format="float",
+        )
+        vec = np.asarray(resp.data[0].embedding, dtype="float32")
+        embed_cache.put_many({key: vec})
+
+    _query_cache[key] = vec
+    if len(_query_cache) > _QUERY_CACHE_MAX:
+        _query_cache.popitem(last=False)
+    return vec
+
+
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def _cosine_nb(a, b):  # pragma: no cover - thin numeric kernel
+        dot = 0.0
+        aa = 0.0
+        bb = 0.0
+        for i in range(a.shape[0]):
+            dot += a[i] * b[i]
+            aa += a[i] * a[i]
+            bb += b[i] * b[i]
+        if aa == 0.0 or bb == 0.0:
+            return 0.0
+        return dot / math.sqrt(aa * bb)
+
+    # Trigger compilation at import (cache=True persists it to disk), so
+    # the first real request doesn't pay the JIT pause.
+    _cosine_nb(np.zeros(1, dtype=np.float32), np.zeros(1, dtype=np.float32))
+else:
+    _cosine_nb = None
 
 
 def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
-    if np.linalg.norm(a) == 0 or np.linalg.norm(b) == 0:
+    # Kept for callers that score a single pair.
+    if _cosine_nb is not None:
+        return float(_cosine_nb(
+            np.ascontiguousarray(a, dtype=np.float32),
+            np.ascontiguousarray(b, dtype=np.float32),
+        ))
+    # vdot avoids the axis handling and extra sqrt that two
+    # np.linalg.norm calls would pay.
+    aa = float(np.vdot(a, a))
+    bb = float(np.vdot(b, b))
+    if aa == 0.0 or bb == 0.0:
         return 0.0
-    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+    return float(np.dot(a, b) / math.sqrt(aa * bb))
+
+
+def _ann_index(matrix: np.ndarray):
+    """HNSW over inner product (== cosine on unit vectors): O(log N)
+    graph traversal per query once the corpus outgrows brute force."""
+    if hnswlib is None or matrix.shape[0] < ANN_MIN_CHUNKS:
+        return None
+    index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+    index.init_index(max_elements=matrix.shape[0], M=32, ef_construction=200)
+    index.add_items(matrix, np.arange(matrix.shape[0]))
+    index.set_ef(64)
+    return index
 
 
 # ── build KB from PDFs ───────────────────────────────────────────────────
 
-def build_knowledge_base_from_paths(pdf_paths: list[str]) -> List[Dict]:
-    kb: List[Dict] = []
-    for path in pdf_paths:
-        raw_text = pdf_to_text(path)
-        chunks = chunk_text(raw_text)
-        embeddings = embed_texts(chunks)
-        for chunk, emb in zip(chunks, embeddings):
-            kb.append(
-                {
-                    "text": chunk,
-                    "source": path,
-                    "embedding": np.array(emb, dtype="float32"),
-                }
-            )
-    return kb
+def build_knowledge_base_from_paths(pdf_paths: list[str]) -> Dict:
+    """Build the KB as one L2-normalized float32 matrix plus metadata.
+
+    Storing embeddings row-wise and normalizing once at build time means
+    a query is scored with a single matrix @ vector product (cosine ==
+    dot product on unit vectors) instead of a Python loop over chunks.
+    """
+    texts: list[str] = []
+    sources: list[str] = []
+
+    # First pass: parse and chunk every PDF in parallel (pdfium releases
+    # the GIL, and even PyPDF2 overlaps disk I/O), then embed the whole
+    # pool in as few API round-trips as the batch size allows.
+    def _parse(path: str) -> list[str]:
+        return list(iter_chunks(iter_pdf_words(path)))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for path, chunks in zip(pdf_paths, pool.map(_parse, pdf_paths)):
+            texts.extend(chunks)
+            sources.extend(path for _ in chunks)
+
+    # Dedup identical chunks (repeated headers/footers, PDFs sharing
+    # boilerplate): each distinct text is embedded once and gets one
+    # matrix row, which also keeps duplicates from crowding the top-k
+    # with the same hit. First source seen wins for attribution.
+    seen: dict[str, int] = {}
+    unique_texts: list[str] = []
+    unique_sources: list[str] = []
+    for text, source in zip(texts, sources):
+        if text not in seen:
+            seen[text] = len(unique_texts)
+            unique_texts.append(text)
+            unique_sources.append(source)
+    texts, sources = unique_texts, unique_sources
+
+    embeddings = embed_texts_batched(texts)
+    if not embeddings:
+        return {}
+
+    matrix = np.asarray(embeddings, dtype="float32")
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    matrix /= norms
+
+    # int8 quantization (symmetric, one scale for the matrix): 4x less
+    # bandwidth for the first-pass scoring scan. The float matrix stays
+    # for exact re-ranking of the short candidate list.
+    scale = float(np.abs(matrix).max()) / 127.0
+    if scale == 0.0:
+        scale = 1.0
+    matrix_q = np.round(matrix / scale).astype(np.int8)
+
+    index = _ann_index(matrix)
+
+    meta = [{"text": t, "source": s} for t, s in zip(texts, sources)]
+    # The full-precision matrix is only ever read to re-rank a handful of
+    # candidates, so keep it in float16 — half the resident memory, and
+    # the upcast of ~20 rows per query is noise. float16 keeps ~3 decimal
+    # digits, well inside what cosine ranking needs.
+    return {
+        "matrix": matrix.astype(np.float16),
+        "matrix_q": matrix_q,
+        "scale": scale,
+        "index": index,
+        "meta": meta,
+    }
+
+
+# ── KB persistence ───────────────────────────────────────────────────────
+
+def save_kb(kb: Dict, path: str = "kb.npz") -> None:
+    """Write the built KB to an .npz archive (see scripts/build_kb.py)."""
+    meta = kb["meta"]
+    np.savez(  # uncompressed: members read back as a plain copy, no inflate pass
+        path,
+        matrix=kb["matrix"],
+        matrix_q=kb["matrix_q"],
+        scale=np.float32(kb["scale"]),
+        texts=np.array([m["text"] for m in meta], dtype=object),
+        sources=np.array([m["source"] for m in meta], dtype=object),
+    )
+
+
+def load_kb_from_npz(path: str = "kb.npz") -> Dict:
+    """Load a KB written by save_kb — no parsing and no embedding calls.
+
+    The ANN index is rebuilt from the stored vectors when the corpus is
+    big enough; that is pure local CPU and still far cheaper than a full
+    rebuild.
+
+    Note: members of an .npz are read into memory on access — numpy
+    ignores mmap_mode inside zip archives — so the win here is skipping
+    the rebuild, not page-cache sharing.
+    """
+    data = np.load(path, allow_pickle=True)
+    matrix = data["matrix"]
+    meta = [
+        {"text": str(t), "source": str(s)}
+        for t, s in zip(data["texts"], data["sources"])
+    ]
+    return {
+        "matrix": matrix,
+        "matrix_q": data["matrix_q"],
+        "scale": float(data["scale"]),
+        "index": _ann_index(np.asarray(matrix, dtype="float32")),
+        "meta": meta,
+    }
 
 
 # ── retrieval ────────────────────────────────────────────────────────────
 
-def retrieve_relevant_chunks(question: str, kb: List[Dict], k: int = 5) -> List[Dict]:
+async def retrieve_relevant_chunks(question: str, kb: Dict, k: int = 5) -> List[Dict]:
     if not kb:
         return []
-    q_emb = embed_texts([question])[0]
-    q_vec = np.array(q_emb, dtype="float32")
-    scored = []
-    for item in kb:
-        score = cosine_similarity(q_vec, item["embedding"])
-        scored.append((score, item))
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [item for score, item in scored[:k]]
+    matrix = kb["matrix"]
+    meta = kb["meta"]
+
+    q_vec = await embed_query(question)
+    q_norm = np.linalg.norm(q_vec)
+    if q_norm == 0.0:
+        return []
+    q_unit = q_vec / q_norm
+
+    k = min(k, len(meta))
+
+    index = kb.get("index")
+    if index is not None:
+        labels, _ = index.knn_query(q_unit, k=k)
+        return [meta[int(i)] for i in labels[0]]
+
+    # Stage 1: approximate scan over the int8 matrix (4x less memory
+    # traffic), keeping a few times k candidates.
+    q_q = np.clip(np.round(q_unit / kb["scale"]), -127, 127).astype(np.int8)
+    approx = kb["matrix_q"].astype(np.int32) @ q_q.astype(np.int32)
+    m = min(4 * k, len(meta))
+    cand = np.argpartition(-approx, m - 1)[:m]
+
+    # Stage 2: exact float re-rank of just the candidates (stored as
+    # float16; upcast the short slice before the dot product).
+    exact = matrix[cand].astype(np.float32) @ q_unit
+    idx = cand[np.argsort(-exact)[:k]]
+    return [meta[i] for i in idx]
+
+
+# ── semantic feedback cache ──────────────────────────────────────────────
+#
+# Classroom traffic repeats: many students answer the same question the
+# same way. Cache feedback keyed by the embedding of (question + answer)
+# and reuse it when a new request is near-identical, skipping the whole
+# chat completion. Bounded LRU so memory stays flat.
+
+FEEDBACK_CACHE_THRESHOLD = float(os.getenv("FEEDBACK_CACHE_THRESHOLD", "0.95"))
+_FEEDBACK_CACHE_MAX = 1024
+
+_fb_vecs: np.ndarray | None = None          # unit vectors, one row per slot
+_fb_entries: "OrderedDict[int, str]" = OrderedDict()  # row -> cached feedback
+_fb_rows = 0                                 # rows allocated so far
+
+
+def _feedback_cache_lookup(vec: np.ndarray) -> str | None:
+    if not _fb_entries:
+        return None
+    rows = np.fromiter(_fb_entries.keys(), dtype=np.int64)
+    scores = _fb_vecs[rows] @ vec
+    best = int(np.argmax(scores))
+    if float(scores[best]) >= FEEDBACK_CACHE_THRESHOLD:
+        row = int(rows[best])
+        _fb_entries.move_to_end(row)
+        return _fb_entries[row]
+    return None
+
+
+def _feedback_cache_insert(vec: np.ndarray, feedback: str) -> None:
+    global _fb_vecs, _fb_rows
+    if len(_fb_entries) >= _FEEDBACK_CACHE_MAX:
+        row, _ = _fb_entries.popitem(last=False)  # evict LRU, reuse its slot
+    else:
+        row = _fb_rows
+        _fb_rows += 1
+        if _fb_vecs is None:
+            _fb_vecs = np.zeros((16, vec.shape[0]), dtype="float32")
+        elif row >= _fb_vecs.shape[0]:
+            grown = np.zeros((_fb_vecs.shape[0] * 2, vec.shape[0]), dtype="float32")
+            grown[:_fb_vecs.shape[0]] = _fb_vecs
+            _fb_vecs = grown
+    _fb_vecs[row] = vec
+    _fb_entries[row] = feedback
 
 
 # ── tutoring feedback API ────────────────────────────────────────────────
 
-def feedback_on_student_answer(question: str, student_answer: str, kb: List[Dict]) -> str:
+async def feedback_on_student_answer(question: str, student_answer: str, kb: Dict) -> str:
+    cache_vec = np.array(
+        await embed_query(question + "\n" + student_answer), dtype="float32"
+    )
+    norm = np.linalg.norm(cache_vec)
+    if norm:
+        cache_vec /= norm
+        cached = _feedback_cache_lookup(cache_vec)
+        if cached is not None:
+            return cached
+
     if kb:
-        top_chunks = retrieve_relevant_chunks(question, kb, k=5)
+        top_chunks = await retrieve_relevant_chunks(question, kb, k=5)
         context_blocks = []
         for i, item in enumerate(top_chunks):
             context_blocks.append(
@@ -119,32 +538,31 @@ def feedback_on_student_answer(question: str, student_answer: str, kb: List[Dict
     else:
         context_text = "No PDF knowledge base is loaded."
 
-    system_prompt = (
-        "You are BrighterText, a dyslexia-friendly reading tutor. "
-        "You give feedback on student answers.\n\n"
-        "Rules:\n"
-        "- Use short sentences and simple words.\n"
-        "- Always be encouraging.\n"
-        "- First say what they did well.\n"
-        "- Then gently explain what is missing or incorrect.\n"
-        "- Show a short model answer.\n"
-        "- End with one small practice suggestion."
-    )
-
-    user_prompt = (
-        f"Question:\n{question}\n\n"
-        f"Student's answer:\n{student_answer}\n\n"
-        f"Context from teaching PDFs:\n{context_text}\n\n"
-        "Give feedback following the rules above."
-    )
-
-    resp = client.chat.completions.create(
+    # Stable-to-volatile message order: the system prompt and retrieved
+    # context (which repeats across students answering the same question)
+    # come first, the per-student answer last, so the longest possible
+    # prefix stays cacheable server-side.
+    resp = await async_client.chat.completions.create(
         model=CHAT_MODEL,
         messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": f"Context from teaching PDFs:\n{context_text}",
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"Question:\n{question}\n\n"
+                    f"Student's answer:\n{student_answer}\n\n"
+                    "Give feedback following the rules above."
+                ),
+            },
         ],
         temperature=0.4,
     )
 
-    return resp.choices[0].message.content
+    feedback = resp.choices[0].message.content
+    if norm:
+        _feedback_cache_insert(cache_vec, feedback)
+    return feedback
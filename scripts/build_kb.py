@@ -0,0 +1,38 @@
+"""Build the RAG knowledge base offline and save it to kb.npz.
+
+Run this after changing the teaching PDFs so the server can start by
+loading the prebuilt archive instead of parsing and embedding at boot:
+
+    python scripts/build_kb.py dyslexia_research.pdf [more.pdf ...]
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_backend import build_knowledge_base_from_paths, save_kb  # noqa: E402
+
+DEFAULT_PDFS = ["dyslexia_research.pdf"]
+
+
+def main() -> None:
+    pdf_paths = sys.argv[1:] or DEFAULT_PDFS
+    existing = [p for p in pdf_paths if os.path.exists(p)]
+    missing = [p for p in pdf_paths if p not in existing]
+    for p in missing:
+        print(f"WARNING: skipping missing PDF {p}")
+    if not existing:
+        sys.exit("No PDFs found, nothing to build.")
+
+    kb = build_knowledge_base_from_paths(existing)
+    if not kb:
+        sys.exit("KB build produced no chunks.")
+
+    out = os.getenv("KB_PATH", "kb.npz")
+    save_kb(kb, out)
+    print(f"Wrote {out}: {len(kb['meta'])} chunks from {len(existing)} PDF(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,9 @@ from dotenv import load_dotenv
 from typing import List, Dict
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel
 from openai import OpenAI
 import os
@@ -10,6 +13,8 @@ import os
 from rag_backend import (
     build_knowledge_base_from_paths,
     feedback_on_student_answer,
+    load_kb_from_npz,
+    save_kb,
 )
 
 # ----------- env + OpenAI client ----------------
@@ -19,8 +24,11 @@ client = OpenAI()
 print("DEBUG OPENAI key prefix:", os.getenv("OPENAI_API_KEY", "")[:7])
 
 # ----------- FastAPI app ------------------------
-app = FastAPI()
+# orjson serializes responses several times faster than stdlib json, and
+# gzip shrinks the (text-heavy) feedback payloads for slow school networks.
+app = FastAPI(default_response_class=ORJSONResponse)
 
+app.add_middleware(GZipMiddleware, minimum_size=500)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],       # OK for dev
@@ -31,12 +39,14 @@ app.add_middleware(
 
 # ----------- build RAG knowledge base ------------
 
-KB: List[Dict] = []
+KB: Dict = {}
+
+KB_PATH = os.getenv("KB_PATH", "kb.npz")
 
 
 @app.on_event("startup")
 def load_kb():
-    """Build the RAG knowledge base once, from your PDFs."""
+    """Load the prebuilt KB if it's current, otherwise build it from PDFs."""
     global KB
 
     pdf_paths = [
@@ -46,14 +56,33 @@ def load_kb():
         # "syntax_article.pdf",
     ]
 
-    existing = [p for p in pdf_paths if os.path.exists(p)]
+    # stat() the candidates in parallel — on network mounts each check
+    # can take tens of ms, and they're independent.
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        checks = list(pool.map(os.path.exists, pdf_paths))
+    existing = [p for p, ok in zip(pdf_paths, checks) if ok]
+    for p in existing:
+        print(f"Found PDF {p} ({os.path.getsize(p)} bytes)")
+
+    # A kb.npz at least as new as every PDF (written by scripts/build_kb.py
+    # or a previous startup) skips parsing and embedding entirely.
+    if os.path.exists(KB_PATH) and (
+        not existing
+        or os.path.getmtime(KB_PATH) >= max(os.path.getmtime(p) for p in existing)
+    ):
+        KB = load_kb_from_npz(KB_PATH)
+        print(f"Loaded KB with {len(KB.get('meta', []))} chunks from {KB_PATH}")
+        return
+
     if not existing:
         print("WARNING: no PDFs found for KB")
-        KB = []
+        KB = {}
         return
 
     KB = build_knowledge_base_from_paths(existing)
-    print(f"Loaded KB with {len(KB)} chunks from {existing}")
+    if KB:
+        save_kb(KB, KB_PATH)
+    print(f"Loaded KB with {len(KB.get('meta', []))} chunks from {existing}")
 
 
 # ----------- feedback endpoint -------------------
@@ -75,7 +104,7 @@ async def feedback_endpoint(req: FeedbackRequest):
     Return dyslexia-friendly feedback on a student's answer,
     using your RAG model + PDFs.
     """
-    fb = feedback_on_student_answer(
+    fb = await feedback_on_student_answer(
         question=req.question,
         student_answer=req.student_answer,
         kb=KB,